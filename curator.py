@@ -3,10 +3,14 @@ curator.py - Scraper Layer for Muse CLI
 Handles Apify interaction to scrape artwork from Meisterdrucke gallery.
 """
 
+import asyncio
 import os
-from typing import List, Dict
+import threading
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, List, Dict, Tuple
 from urllib.parse import quote_plus
-from apify_client import ApifyClient
+from apify_client import ApifyClient, ApifyClientAsync
 
 
 class CuratorError(Exception):
@@ -14,263 +18,363 @@ class CuratorError(Exception):
     pass
 
 
-def search_art(keywords: str, max_results: int = 10) -> List[Dict[str, str]]:
-    """
-    Search for artwork on Meisterdrucke using the provided keywords.
+# Apify actor used for all Meisterdrucke searches
+_ACTOR_ID = "apify/cheerio-scraper"
+
+# Read once; the token doesn't change during a CLI run
+_API_TOKEN = os.getenv("APIFY_TOKEN")
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_token: str) -> ApifyClient:
+    """Get a shared Apify client for the given token, reusing its HTTP session."""
+    return ApifyClient(api_token)
+
+
+# Page function for cheerio-scraper
+# This JavaScript will be executed by the scraper. Kept at module level so the
+# literal is built once at import time rather than on every search.
+_PAGE_FUNCTION = r"""
+async function pageFunction(context) {
+    const { $, request, log, customData } = context;
+
+    // Columnar results: one dataset item with parallel arrays instead of N small objects
+    const titles = [];
+    const artists = [];
+    const imageUrls = [];
+    const maxResults = (customData && customData.maxResults) || 10;
+
+    // Denylists and selectors, built once per page and shared by every image
+    const URL_DENY = /placeholder|loading|blank\.|logo|icon/;
+    const ALT_DENY = /logo|meisterdrucke|deutsch|english|français|español|italiano|dhl|post\.at|quehenberger|cargoboard|fedex|ups|shipping|payment|visa|mastercard|paypal|erfahrungen|bewertungen|reviews|rating/;
+    const EXCLUDED_SECTIONS = '.sidebar, #sidebar, .featured, .popular, .recommended, .trending, aside, .widget, header, footer, nav, .navigation, .menu';
+    const EXCLUDED_IMAGES = EXCLUDED_SECTIONS.split(',').map(sel => sel.trim() + ' img').join(', ');
+    const ARTWORK_CARD = 'div, li, article';
+    const ARTIST_SELECTOR = '.artist, .artist-name, [class*="artist"]';
+    const URL_SCHEME = /^https?:/;
+
+    // Log the page title to verify we got the right page
+    log.info(`Page title: ${$('title').text()}`);
+    log.info(`Current URL: ${request.url}`);
+
+    // Try to find the main search results container first
+    const resultContainers = [
+        '.search-results',
+        '#search-results',
+        '.results',
+        '#results',
+        '.product-list',
+        '.products',
+        'main',
+        '#main',
+        '.content',
+        '#content'
+    ];
+
+    let $container = null;
+    for (const containerSelector of resultContainers) {
+        const $found = $(containerSelector);
+        if ($found.length > 0) {
+            log.info(`Found container: ${containerSelector}`);
+            $container = $found;
+            break;
+        }
+    }
 
-    Args:
-        keywords: Space-separated search keywords
-        max_results: Maximum number of results to return (default: 10)
+    // If no container found, use the whole page but skip header/footer/nav
+    if (!$container) {
+        log.info('No specific container found, using body');
+        $container = $('body');
+    }
 
-    Returns:
-        List of dictionaries containing artwork information:
-        - title: Artwork title
-        - artist: Artist name
-        - image_url: URL to the artwork image
+    // Get all images from container but filter based on parent elements
+    log.info('Finding all images and filtering by parent context');
 
-    Raises:
-        CuratorError: If API token is missing or scraping fails
-    """
-    api_token = os.getenv("APIFY_TOKEN")
-    if not api_token:
-        raise CuratorError("APIFY_TOKEN environment variable not set")
+    const $allImages = $container.find('img');
+    log.info(`Total images in container: ${$allImages.length}`);
 
-    # Initialize Apify client
-    client = ApifyClient(api_token)
+    // Filter out images that are in excluded sections with a single selector
+    // match, instead of a JS callback walking each image's ancestors
+    const $images = $allImages.not(EXCLUDED_IMAGES);
 
-    # URL encode keywords (replace spaces with +)
-    encoded_keywords = quote_plus(keywords)
-    target_url = f"https://www.meisterdrucke.ie/suche/{encoded_keywords}.html"
-
-    # Page function for cheerio-scraper
-    # This JavaScript will be executed by the scraper
-    page_function = """
-    async function pageFunction(context) {
-        const { $, request, log } = context;
-
-        const results = [];
-
-        // Log the page title to verify we got the right page
-        log.info(`Page title: ${$('title').text()}`);
-        log.info(`Current URL: ${request.url}`);
-
-        // Try to find the main search results container first
-        const resultContainers = [
-            '.search-results',
-            '#search-results',
-            '.results',
-            '#results',
-            '.product-list',
-            '.products',
-            'main',
-            '#main',
-            '.content',
-            '#content'
-        ];
-
-        let $container = null;
-        for (const containerSelector of resultContainers) {
-            const $found = $(containerSelector);
-            if ($found.length > 0) {
-                log.info(`Found container: ${containerSelector}`);
-                $container = $found;
-                break;
-            }
-        }
+    log.info(`Images after filtering out sidebars/headers/footers: ${$images.length}`)
 
-        // If no container found, use the whole page but skip header/footer/nav
-        if (!$container) {
-            log.info('No specific container found, using body');
-            $container = $('body');
-        }
+    // Track seen (normalized) URLs to avoid duplicates
+    const seenUrls = new Set();
 
-        // Get all images from container but filter based on parent elements
-        log.info('Finding all images and filtering by parent context');
+    // Process each image
+    $images.each((index, img) => {
+        // Stop walking the page once enough artworks have been collected
+        if (titles.length >= maxResults) return false;
 
-        const $allImages = $container.find('img');
-        log.info(`Total images in container: ${$allImages.length}`);
+        const $img = $(img);
 
-        // Filter out images that are in excluded sections
-        const $images = $allImages.filter((i, img) => {
-            const $img = $(img);
-            const $parents = $img.parents();
+        // Handle lazy loading: check multiple attributes
+        let imageUrl = $img.attr('data-src') ||
+                      $img.attr('data-lazy-src') ||
+                      $img.attr('data-original') ||
+                      $img.attr('src');
 
-            // Exclude images in these containers
-            if ($parents.filter('.sidebar, #sidebar, .featured, .popular, .recommended, .trending, aside, .widget, header, footer, nav, .navigation, .menu').length > 0) {
-                return false;
-            }
+        // Skip if no image URL
+        if (!imageUrl) return;
 
-            // Exclude images in header/footer/nav directly
-            if ($img.closest('header, footer, nav, aside, .sidebar').length > 0) {
-                return false;
-            }
+        // Cheapest checks first: URL denylist, then alt text, then size.
+        // Skip placeholder/loading images
+        if (URL_DENY.test(imageUrl)) return;
 
-            return true;
-        });
-
-        log.info(`Images after filtering out sidebars/headers/footers: ${$images.length}`)
-
-        // Track seen URLs to avoid duplicates
-        const seenUrls = new Set();
-
-        // Process each image
-        $images.each((index, img) => {
-            const $img = $(img);
-
-            // Handle lazy loading: check multiple attributes
-            let imageUrl = $img.attr('data-src') ||
-                          $img.attr('data-lazy-src') ||
-                          $img.attr('data-original') ||
-                          $img.attr('src');
-
-            // Skip if no image URL
-            if (!imageUrl) return;
-
-            // Get alt text for filtering
-            const altText = ($img.attr('alt') || '').toLowerCase();
-
-            // Skip placeholder/loading images
-            if (imageUrl.includes('placeholder') ||
-                imageUrl.includes('loading') ||
-                imageUrl.includes('blank.') ||
-                imageUrl.includes('logo') ||
-                imageUrl.includes('icon')) return;
-
-            // Skip non-artwork images based on alt text
-            const skipAltTexts = [
-                'logo',
-                'meisterdrucke',
-                'deutsch',
-                'english',
-                'français',
-                'español',
-                'italiano',
-                'dhl',
-                'post.at',
-                'quehenberger',
-                'cargoboard',
-                'fedex',
-                'ups',
-                'shipping',
-                'payment',
-                'visa',
-                'mastercard',
-                'paypal',
-                'erfahrungen',
-                'bewertungen',
-                'reviews',
-                'rating'
-            ];
-
-            if (skipAltTexts.some(skip => altText.includes(skip))) {
-                return;
-            }
+        // Get alt text for filtering (read once, reused for the title below)
+        const altRaw = $img.attr('alt') || '';
+        const altText = altRaw.toLowerCase();
 
-            // Also skip if alt text is very short (likely not artwork)
-            if (altText.length > 0 && altText.length < 5) {
-                return;
-            }
+        // Skip non-artwork images based on alt text
+        if (ALT_DENY.test(altText)) {
+            return;
+        }
 
-            // Skip very small images (likely icons/UI elements)
-            const width = parseInt($img.attr('width')) || parseInt($img.css('width')) || 0;
-            const height = parseInt($img.attr('height')) || parseInt($img.css('height')) || 0;
+        // Also skip if alt text is very short (likely not artwork)
+        if (altText.length > 0 && altText.length < 5) {
+            return;
+        }
 
-            // Filter out images that are definitely too small (less than 100px in either dimension)
-            if ((width > 0 && width < 100) || (height > 0 && height < 100)) {
-                return;
-            }
+        // Skip very small images (likely icons/UI elements), less than 100px in
+        // either dimension. The css() fallback is the costliest lookup, so it only
+        // runs when the attribute is missing, and height is only read if width passes.
+        const width = parseInt($img.attr('width')) || parseInt($img.css('width')) || 0;
+        if (width > 0 && width < 100) {
+            return;
+        }
 
-            // Make URL absolute if relative
-            if (imageUrl.startsWith('//')) {
-                imageUrl = 'https:' + imageUrl;
-            } else if (imageUrl.startsWith('/')) {
-                imageUrl = 'https://www.meisterdrucke.ie' + imageUrl;
-            } else if (!imageUrl.startsWith('http')) {
-                imageUrl = 'https://www.meisterdrucke.ie/' + imageUrl;
-            }
+        const height = parseInt($img.attr('height')) || parseInt($img.css('height')) || 0;
+        if (height > 0 && height < 100) {
+            return;
+        }
 
-            // Skip duplicates
-            if (seenUrls.has(imageUrl)) {
-                return;
-            }
-            seenUrls.add(imageUrl);
+        // Make URL absolute if relative
+        if (imageUrl.startsWith('//')) {
+            imageUrl = 'https:' + imageUrl;
+        } else if (imageUrl.startsWith('/')) {
+            imageUrl = 'https://www.meisterdrucke.ie' + imageUrl;
+        } else if (!imageUrl.startsWith('http')) {
+            imageUrl = 'https://www.meisterdrucke.ie/' + imageUrl;
+        }
 
-            // Get title from alt text or parent link
-            const $link = $img.closest('a');
-            let title = $img.attr('alt') || $img.attr('title') || $link.attr('title') || '';
+        // Skip duplicates. Key on scheme-less, query-less, lower-cased URL so the
+        // same artwork served as http/https or with resize parameters counts once.
+        const urlKey = imageUrl.replace(URL_SCHEME, '').split('?')[0].toLowerCase();
+        if (seenUrls.has(urlKey)) {
+            return;
+        }
+        seenUrls.add(urlKey);
 
-            // Clean up title
-            title = title.trim();
-            if (!title || title.length < 2) {
-                title = 'Untitled';
-            }
+        // Get title from alt text or parent link
+        const $link = $img.closest('a');
+        let title = altRaw || $img.attr('title') || $link.attr('title') || '';
 
-            // Try to extract artist name
-            let artist = 'Unknown Artist';
-
-            // Look for artist in parent elements
-            const $parent = $img.closest('div, li, article');
-            const $artistEl = $parent.find('.artist, .artist-name, [class*="artist"]').first();
-            if ($artistEl.length > 0 && $artistEl.text().trim()) {
-                artist = $artistEl.text().trim();
-            } else {
-                // Try to extract from title
-                const titleLower = title.toLowerCase();
-                if (titleLower.includes(' by ')) {
-                    const parts = title.split(/ by /i);
-                    if (parts.length > 1) {
-                        artist = parts[1].split(',')[0].split('(')[0].trim();
-                    }
-                } else if (titleLower.includes(' - ')) {
-                    const parts = title.split(' - ');
-                    if (parts.length >= 2) {
-                        // Usually format is "Title - Artist" or "Title - Artist, Year"
-                        artist = parts[1].split(',')[0].split('(')[0].trim();
-                    }
+        // Clean up title
+        title = title.trim();
+        if (!title || title.length < 2) {
+            title = 'Untitled';
+        }
+
+        // Try to extract artist name
+        let artist = 'Unknown Artist';
+
+        // Look for artist in parent elements
+        const $parent = $img.closest(ARTWORK_CARD);
+        const $artistEl = $parent.find(ARTIST_SELECTOR).first();
+        const artistText = $artistEl.length > 0 ? $artistEl.text().trim() : '';
+        if (artistText) {
+            artist = artistText;
+        } else {
+            // Try to extract from title
+            // Index scan instead of split(/ by /i): no regex match objects per image
+            const titleLower = title.toLowerCase();
+            const byIndex = titleLower.indexOf(' by ');
+            if (byIndex !== -1) {
+                // Segment after the first " by ", up to the next one if present
+                const nextBy = titleLower.indexOf(' by ', byIndex + 4);
+                const segment = title.slice(byIndex + 4, nextBy === -1 ? undefined : nextBy);
+                artist = segment.split(',')[0].split('(')[0].trim();
+            } else if (titleLower.includes(' - ')) {
+                const parts = title.split(' - ');
+                if (parts.length >= 2) {
+                    // Usually format is "Title - Artist" or "Title - Artist, Year"
+                    artist = parts[1].split(',')[0].split('(')[0].trim();
                 }
             }
+        }
 
-            results.push({
-                title: title,
-                artist: artist,
-                image_url: imageUrl
-            });
-        });
+        titles.push(title);
+        artists.push(artist);
+        imageUrls.push(imageUrl);
+    });
 
-        log.info(`Found ${results.length} artwork results`);
+    log.info(`Found ${titles.length} artwork results`);
 
-        // Push all results to dataset at once (much faster than one-by-one)
-        if (results.length > 0) {
-            await context.pushData(results);
-        }
+    // Push all results to dataset as a single columnar item
+    if (titles.length > 0) {
+        await context.pushData({ titles, artists, image_urls: imageUrls });
     }
-    """
+}
+"""
 
-    # Configure the scraper run
-    run_input = {
-        "startUrls": [{"url": target_url}],
-        "pageFunction": page_function,
+
+def _get_api_token() -> str:
+    """Return the Apify token read at import time, or raise CuratorError."""
+    if not _API_TOKEN:
+        raise CuratorError("APIFY_TOKEN environment variable not set")
+    return _API_TOKEN
+
+
+@lru_cache(maxsize=256)
+def _target_url(keywords: str) -> str:
+    """Build the Meisterdrucke search URL for the given keywords."""
+    # URL encode keywords (replace spaces with +)
+    return f"https://www.meisterdrucke.ie/suche/{quote_plus(keywords)}.html"
+
+
+def _build_run_input(keywords: str, max_results: int) -> Dict:
+    """Build the cheerio-scraper run input for a Meisterdrucke keyword search."""
+    return {
+        "startUrls": [{"url": _target_url(keywords)}],
+        "pageFunction": _PAGE_FUNCTION,
         "proxyConfiguration": {"useApifyProxy": True},
         "maxRequestsPerCrawl": 1,  # Only scrape the search results page
+        "customData": {"maxResults": max_results},  # Lets pageFunction stop early
     }
 
+
+def _unpack(items: Iterable[Dict[str, List[str]]], max_results: int) -> List[Dict[str, str]]:
+    """Rebuild at most max_results artwork dicts from the columnar dataset item."""
+    # pageFunction pushes one item holding parallel titles/artists/image_urls arrays
+    for item in items:
+        # Skip anything else in the dataset, e.g. the '#error' item cheerio-scraper pushes for a failed page
+        if not all(column in item for column in ("titles", "artists", "image_urls")):
+            continue
+        columns = zip(item["titles"], item["artists"], item["image_urls"])
+        return [
+            {"title": title, "artist": artist, "image_url": image_url}
+            for title, artist, image_url in islice(columns, max_results)
+        ]
+    return []
+
+
+def _normalize_keywords(keywords: str) -> str:
+    """Normalize keywords so trivially different spellings share a cache entry."""
+    return " ".join(keywords.lower().split())
+
+
+def _prefetch_artists(api_token: str, artworks: Tuple[Dict[str, str], ...], max_results: int) -> None:
+    """Warm the result cache for up to three artists found in the given results."""
+    artists = [a.get("artist") for a in artworks]
+    candidates = [a for a in dict.fromkeys(artists) if a and a != "Unknown Artist"][:3]
+
+    def _warm():
+        for artist in candidates:
+            try:
+                _search_art_cached(api_token, _normalize_keywords(artist), max_results)
+            except CuratorError:
+                # Prefetch is best effort
+                continue
+
+    if candidates:
+        threading.Thread(target=_warm, name="muse-prefetch", daemon=True).start()
+
+
+def search_art(keywords: str, max_results: int = 10, prefetch: bool = False) -> List[Dict[str, str]]:
+    """
+    Search for artwork on Meisterdrucke using the provided keywords.
+
+    Results are cached in-process per (keywords, max_results), so repeating
+    a search in the same session does not re-run the Apify actor.
+
+    Args:
+        keywords: Space-separated search keywords
+        max_results: Maximum number of results to return (default: 10)
+        prefetch: If True, warm the cache in the background for the artists
+            in the results, so likely follow-up searches return instantly.
+            Each prefetch is a billed actor run, so this is off by default
+            and only useful in long-lived processes.
+
+    Returns:
+        List of dictionaries containing artwork information:
+        - title: Artwork title
+        - artist: Artist name
+        - image_url: URL to the artwork image
+
+    Raises:
+        CuratorError: If API token is missing or scraping fails
+    """
+    api_token = _get_api_token()
+
+    artworks = _search_art_cached(api_token, _normalize_keywords(keywords), max_results)
+
+    if prefetch:
+        _prefetch_artists(api_token, artworks, max_results)
+
+    # Hand out copies so callers can't mutate the cached entries
+    return [dict(artwork) for artwork in artworks]
+
+
+@lru_cache(maxsize=256)
+def _search_art_cached(api_token: str, keywords: str, max_results: int) -> Tuple[Dict[str, str], ...]:
+    """Run the scraper for a normalized query. Failures raise and are not cached."""
+    # Reuse the Apify client (and its warm connections) across calls
+    client = _get_client(api_token)
+
+    # Configure the scraper run
+    run_input = _build_run_input(keywords, max_results)
+
     try:
         # Run the actor
-        run = client.actor("apify/cheerio-scraper").call(run_input=run_input)
+        run = client.actor(_ACTOR_ID).call(run_input=run_input)
+
+        # Fetch results from dataset (a single columnar item)
+        dataset = client.dataset(run["defaultDatasetId"])
+        return tuple(_unpack(dataset.iterate_items(limit=1), max_results))
+
+    except Exception as e:
+        raise CuratorError(f"Scraping failed: {str(e)}")
 
-        # Fetch results from dataset
-        results = []
-        for item in client.dataset(run["defaultDatasetId"]).iterate_items():
-            # pageFunction pushes an array, so we need to flatten it
-            if isinstance(item, list):
-                results.extend(item)
-            elif isinstance(item, dict):
-                results.append(item)
 
-        # Limit results
-        results = results[:max_results]
+async def search_art_batch(
+    queries: List[str],
+    max_results: int = 10,
+    max_concurrency: int = 5
+) -> List[List[Dict[str, str]]]:
+    """
+    Search Meisterdrucke for several keyword queries concurrently.
+
+    Each query runs its own cheerio-scraper actor; at most max_concurrency
+    runs are in flight at once.
+
+    Args:
+        queries: List of space-separated search keyword strings
+        max_results: Maximum number of results to return per query (default: 10)
+        max_concurrency: Maximum number of concurrent actor runs (default: 5)
+
+    Returns:
+        List of result lists, in the same order as queries. Each result list
+        has the same shape as the return value of search_art.
 
-        return results
+    Raises:
+        CuratorError: If API token is missing or any scrape fails
+    """
+    api_token = _get_api_token()
+
+    # One async client per batch; its connections are bound to the running event loop
+    client = ApifyClientAsync(api_token)
+    sem = asyncio.Semaphore(max_concurrency)
 
+    async def _one(keywords: str) -> List[Dict[str, str]]:
+        async with sem:
+            run_input = _build_run_input(_normalize_keywords(keywords), max_results)
+            run = await client.actor(_ACTOR_ID).call(run_input=run_input)
+            dataset = client.dataset(run["defaultDatasetId"])
+            items = [item async for item in dataset.iterate_items(limit=1)]
+            return _unpack(items, max_results)
+
+    try:
+        return list(await asyncio.gather(*[_one(q) for q in queries]))
     except Exception as e:
-        raise CuratorError(f"Scraping failed: {str(e)}")
+        raise CuratorError(f"Batch scraping failed: {str(e)}")
@@ -4,9 +4,19 @@ Handles integration with official museum and gallery APIs.
 """
 
 import os
+import threading
+import time
+from collections import deque
+from itertools import islice
 import requests
-from typing import List, Dict
-from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterator, List, Dict, Optional
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from requests_cache import CachedSession
+from urllib3.util import Retry
+from storage import get_data_dir
 
 
 class GalleryAPIError(Exception):
@@ -14,19 +24,170 @@ class GalleryAPIError(Exception):
     pass
 
 
-def search_met_museum(keywords: str, max_results: int = 10) -> List[Dict[str, str]]:
+# Number of Met object detail requests in flight at once
+MET_FETCH_WORKERS = 16
+
+
+# Met object records and WikiArt paintings effectively never change, but search
+# result ordering can, so search endpoints get a much shorter lifetime
+HTTP_CACHE_EXPIRE_AFTER = timedelta(days=30)
+HTTP_CACHE_URLS_EXPIRE_AFTER = {
+    "collectionapi.metmuseum.org/public/collection/v1/search": timedelta(hours=1),
+    "www.wikiart.org/en/api/2/PaintingSearch": timedelta(hours=1),
+}
+
+# Expired responses are kept to serve when an API is down (stale_if_error);
+# once a day, anything older than HTTP_CACHE_MAX_AGE is deleted
+HTTP_CACHE_MAX_AGE = timedelta(days=90)
+HTTP_CACHE_PRUNE_INTERVAL = timedelta(days=1)
+
+
+def _prune_http_cache(session: CachedSession) -> None:
+    """Delete old responses from the HTTP cache, at most once per HTTP_CACHE_PRUNE_INTERVAL."""
+    marker = get_data_dir() / "http_cache.pruned"
+    try:
+        if time.time() - marker.stat().st_mtime < HTTP_CACHE_PRUNE_INTERVAL.total_seconds():
+            return
+    except FileNotFoundError:
+        pass
+
+    try:
+        session.cache.delete(older_than=HTTP_CACHE_MAX_AGE)
+        marker.touch()
+    except Exception:
+        # Best effort; a cache that can't be pruned still works
+        pass
+
+
+def _create_session() -> requests.Session:
     """
-    Search the Metropolitan Museum of Art API.
+    Create an HTTP session with a connection pool large enough for parallel fetches.
+
+    GET responses are cached on disk in ~/.muse-cli/http_cache.sqlite unless
+    MUSE_NO_CACHE=1 is set. Responses older than HTTP_CACHE_MAX_AGE are pruned
+    once a day.
+    """
+    if os.getenv("MUSE_NO_CACHE") == "1":
+        session = requests.Session()
+    else:
+        session = CachedSession(
+            str(get_data_dir() / "http_cache"),
+            backend="sqlite",
+            expire_after=HTTP_CACHE_EXPIRE_AFTER,
+            urls_expire_after=HTTP_CACHE_URLS_EXPIRE_AFTER,
+            allowable_methods=("GET",),
+            stale_if_error=True  # Serve an expired copy if the API is down
+        )
+        _prune_http_cache(session)
+
+    # Back off and retry rate limits and transient server errors so a single
+    # 503 doesn't silently drop an object from the results
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        backoff_jitter=0.1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=retry
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared session so requests reuse keep-alive connections instead of a new TLS handshake each
+_SESSION = _create_session()
+
+
+# API origins per source, used to open connections ahead of the first request
+_SOURCE_ORIGINS = {
+    "met": "https://collectionapi.metmuseum.org/",
+    "wikiart": "https://www.wikiart.org/"
+}
+
+
+def preconnect(source: str) -> None:
+    """
+    Open a pooled connection to a gallery API in the background.
+
+    Call this before other slow work (e.g. keyword generation) so DNS, TCP and
+    TLS setup overlap with it; the next request to that source then reuses the
+    warm connection. Unknown sources are ignored.
 
     Args:
-        keywords: Space-separated search keywords
-        max_results: Maximum number of results to return (default: 10)
+        source: Gallery source ("met", "wikiart")
+    """
+    origin = _SOURCE_ORIGINS.get(source)
+    if origin is None:
+        return
+
+    def _warm():
+        try:
+            _SESSION.head(origin, timeout=5)
+        except requests.RequestException:
+            # Best effort; the real request will report any problem
+            pass
+
+    threading.Thread(target=_warm, name="muse-preconnect", daemon=True).start()
+
+
+def _fetch_met_object(session: requests.Session, object_id: int) -> Optional[Dict[str, str]]:
+    """
+    Fetch a single Met object and convert it to an artwork dictionary.
 
     Returns:
-        List of dictionaries containing artwork information:
-        - title: Artwork title
-        - artist: Artist name
-        - image_url: URL to the artwork image
+        Artwork dictionary, or None if the object has no image or the request fails
+    """
+    try:
+        object_url = f"https://collectionapi.metmuseum.org/public/collection/v1/objects/{object_id}"
+        obj_response = session.get(object_url, timeout=10)
+        obj_response.raise_for_status()
+        obj_data = obj_response.json()
+
+        # Extract artwork details
+        title = obj_data.get("title", "Untitled")
+        artist = obj_data.get("artistDisplayName", "Unknown Artist")
+
+        # Get primary image (prefer primary, fallback to additional)
+        image_url = obj_data.get("primaryImage") or obj_data.get("primaryImageSmall")
+
+        if not image_url:
+            return None  # Skip if no image
+
+        # Clean up artist name
+        if not artist or artist.strip() == "":
+            artist = "Unknown Artist"
+
+        return {
+            "title": title,
+            "artist": artist,
+            "image_url": image_url
+        }
+
+    except (requests.RequestException, ValueError, KeyError):
+        # Skip this object if there's an error
+        return None
+
+
+def iter_met_museum(keywords: str, max_results: int = 10) -> Iterator[Dict[str, str]]:
+    """
+    Search the Metropolitan Museum of Art API, yielding artworks as they arrive.
+
+    Object details are fetched in parallel; each artwork is yielded, in search
+    ranking order, as soon as its own details are in, so callers can show
+    results while the rest are still loading. Closing the generator early
+    cancels the fetches that haven't started.
+
+    Args:
+        keywords: Space-separated search keywords
+        max_results: Maximum number of results to yield (default: 10)
+
+    Yields:
+        Artwork dictionaries (title, artist, image_url)
 
     Raises:
         GalleryAPIError: If the API request fails
@@ -39,54 +200,42 @@ def search_met_museum(keywords: str, max_results: int = 10) -> List[Dict[str, st
             "hasImages": "true"  # Only return objects with images
         }
 
-        response = requests.get(search_url, params=params, timeout=30)
+        response = _SESSION.get(search_url, params=params, timeout=30)
         response.raise_for_status()
         search_data = response.json()
 
         object_ids = search_data.get("objectIDs", [])
         if not object_ids:
-            return []
-
-        # Limit to max_results
-        object_ids = object_ids[:max_results * 2]  # Fetch more since some may not have images
-
-        # Step 2: Fetch details for each object
-        results = []
-        for object_id in object_ids:
-            if len(results) >= max_results:
-                break
-
-            try:
-                object_url = f"https://collectionapi.metmuseum.org/public/collection/v1/objects/{object_id}"
-                obj_response = requests.get(object_url, timeout=10)
-                obj_response.raise_for_status()
-                obj_data = obj_response.json()
-
-                # Extract artwork details
-                title = obj_data.get("title", "Untitled")
-                artist = obj_data.get("artistDisplayName", "Unknown Artist")
-
-                # Get primary image (prefer primary, fallback to additional)
-                image_url = obj_data.get("primaryImage") or obj_data.get("primaryImageSmall")
-
-                if not image_url:
-                    continue  # Skip if no image
-
-                # Clean up artist name
-                if not artist or artist.strip() == "":
-                    artist = "Unknown Artist"
-
-                results.append({
-                    "title": title,
-                    "artist": artist,
-                    "image_url": image_url
-                })
-
-            except (requests.RequestException, ValueError, KeyError):
-                # Skip this object if there's an error
-                continue
-
-        return results
+            return
+
+        # Limit to max_results; hasImages=true already filters server-side, so a
+        # small margin covers the rare object whose image fields are still empty
+        object_ids = object_ids[:max_results + 4]
+
+        # Step 2: Fetch details in parallel, keeping search ranking order. Only as
+        # many fetches as artworks still needed are in flight, so none are left
+        # running (and keeping the process alive) once max_results are found
+        executor = ThreadPoolExecutor(max_workers=MET_FETCH_WORKERS)
+        try:
+            remaining_ids = iter(object_ids)
+            pending = deque()
+            found = 0
+
+            while True:
+                window = min(max_results - found, MET_FETCH_WORKERS)
+                for object_id in islice(remaining_ids, max(window - len(pending), 0)):
+                    pending.append(executor.submit(_fetch_met_object, _SESSION, object_id))
+                if not pending:
+                    break
+
+                # Objects without an image come back as None
+                artwork = pending.popleft().result()
+                if artwork:
+                    found += 1
+                    yield artwork
+        finally:
+            # If the caller stops early, drop fetches that haven't started
+            executor.shutdown(wait=False, cancel_futures=True)
 
     except requests.RequestException as e:
         raise GalleryAPIError(f"Met Museum API request failed: {str(e)}")
@@ -94,6 +243,26 @@ def search_met_museum(keywords: str, max_results: int = 10) -> List[Dict[str, st
         raise GalleryAPIError(f"Met Museum API error: {str(e)}")
 
 
+def search_met_museum(keywords: str, max_results: int = 10) -> List[Dict[str, str]]:
+    """
+    Search the Metropolitan Museum of Art API.
+
+    Args:
+        keywords: Space-separated search keywords
+        max_results: Maximum number of results to return (default: 10)
+
+    Returns:
+        List of dictionaries containing artwork information:
+        - title: Artwork title
+        - artist: Artist name
+        - image_url: URL to the artwork image
+
+    Raises:
+        GalleryAPIError: If the API request fails
+    """
+    return list(iter_met_museum(keywords, max_results))
+
+
 def search_wikiart(keywords: str, max_results: int = 10) -> List[Dict[str, str]]:
     """
     Search WikiArt API for paintings.
@@ -112,25 +281,14 @@ def search_wikiart(keywords: str, max_results: int = 10) -> List[Dict[str, str]]
         GalleryAPIError: If the API request fails
     """
     try:
-        # WikiArt search endpoint
-        search_url = "https://www.wikiart.org/en/Search/Painting"
-        params = {
-            "term": keywords,
-            "page": 1
-        }
-
-        response = requests.get(search_url, params=params, timeout=30)
-        response.raise_for_status()
-
-        # WikiArt returns HTML, but we can use their internal API
-        # Try the JSON endpoint instead
+        # WikiArt's search page returns HTML, so go straight to their JSON API
         api_url = f"https://www.wikiart.org/en/api/2/PaintingSearch"
         api_params = {
             "term": keywords,
             "imageFormat": "Large"
         }
 
-        api_response = requests.get(api_url, params=api_params, timeout=30)
+        api_response = _SESSION.get(api_url, params=api_params, timeout=30)
         api_response.raise_for_status()
         data = api_response.json()
 
@@ -154,7 +312,9 @@ def search_wikiart(keywords: str, max_results: int = 10) -> List[Dict[str, str]]
 
             # Make URL absolute if needed
             if not image_url.startswith("http"):
-                image_url = f"https://uploads.wikiart.org/images/{painting.get('contentId', '')}/{image_url}"
+                # Keep existing %-escapes and the contentId segment; only escape unsafe characters
+                content_id = quote(str(painting.get('contentId', '')), safe='')
+                image_url = f"https://uploads.wikiart.org/images/{content_id}/{quote(image_url.lstrip('/'), safe='/%')}"
 
             results.append({
                 "title": title,
@@ -194,3 +354,28 @@ def search_art_api(source: str, keywords: str, max_results: int = 10) -> List[Di
         raise GalleryAPIError(f"Invalid source: {source}. Choose from: {', '.join(sources.keys())}")
 
     return sources[source](keywords, max_results)
+
+
+def iter_art_api(source: str, keywords: str, max_results: int = 10) -> Iterator[Dict[str, str]]:
+    """
+    Like search_art_api, but yields artworks one at a time as they become available.
+
+    Met results stream in as their details are fetched; WikiArt returns a
+    single page, so its results all become available at once. Errors may be
+    raised while iterating as well as from the call itself.
+
+    Args:
+        source: Gallery source ("met", "wikiart")
+        keywords: Space-separated search keywords
+        max_results: Maximum number of results to yield
+
+    Returns:
+        Iterator of artwork dictionaries
+
+    Raises:
+        GalleryAPIError: If the source is invalid or the API request fails
+    """
+    if source == "met":
+        return iter_met_museum(keywords, max_results)
+
+    return iter(search_art_api(source, keywords, max_results))
@@ -4,12 +4,21 @@ Handles interaction with Google Gemini for converting abstract text to art searc
 Also handles vision-based artwork analysis.
 """
 
+import io
+import mimetypes
 import os
+import re
+import time
+from functools import lru_cache
+import httpx
 import requests
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import urllib3
 from google import genai
-from google.genai import types
+from google.genai import errors, types
+from PIL import Image, ImageOps
+from typing import Optional, Tuple
 from usage_tracker import get_tracker
+from search_cache import get_cached_keywords, save_cached_keywords, CacheError
 
 
 class InterpreterError(Exception):
@@ -22,7 +31,35 @@ class InterpreterTimeoutError(InterpreterError):
     pass
 
 
-def generate_with_timeout(client, model_name: str, prompt: str, timeout_seconds: int = 30) -> str:
+# Gemini model used for both keyword generation and vision analysis
+MODEL_NAME = "gemini-2.0-flash-exp"
+
+# Keyword cleanup patterns, compiled once
+_WHITESPACE_RE = re.compile(r"\s+")
+_BACKTICKS_RE = re.compile(r"^`+|`+$")
+
+# Largest artwork image downloaded for vision analysis
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+
+# Inline images above this size are downscaled to MAX_IMAGE_EDGE pixels before upload
+DOWNSCALE_MIN_BYTES = 512 * 1024
+MAX_IMAGE_EDGE = 1024
+
+# Gemini rejects a file_uri it can't fetch or use with a 4xx (often a generic
+# 400 INVALID_ARGUMENT) or a 500; these errors would fail the inline request too
+_FATAL_ERROR_CODES = (401, 403, 429)
+
+# Shared session for image downloads
+_SESSION = requests.Session()
+
+
+@lru_cache(maxsize=1)
+def _get_client(api_key: str) -> genai.Client:
+    """Return a shared Gemini client so the SDK setup and its connection pool are reused."""
+    return genai.Client(api_key=api_key)
+
+
+def generate_with_timeout(client, model_name: str, prompt: str, timeout_seconds: int = 30) -> types.GenerateContentResponse:
     """
     Generate content with timeout protection.
 
@@ -33,45 +70,178 @@ def generate_with_timeout(client, model_name: str, prompt: str, timeout_seconds:
         timeout_seconds: Maximum time to wait for response
 
     Returns:
-        Generated text content
+        The model response (generated text in .text, token counts in .usage_metadata)
 
     Raises:
         InterpreterTimeoutError: If the request times out
         InterpreterError: If the request fails
     """
-    def _generate():
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.7,
-                    top_p=0.95,
-                    top_k=40,
-                    max_output_tokens=100,
-                    system_instruction="You are an art curator. Convert the provided abstract text into a search query for an art database. Focus on visual subjects, art styles, and specific painter names. Return ONLY the search keywords separated by spaces. Do not use markdown."
-                )
+    try:
+        response = client.models.generate_content(
+            model=model_name,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                temperature=0.7,
+                top_p=0.95,
+                top_k=40,
+                max_output_tokens=100,
+                system_instruction="You are an art curator. Convert the provided abstract text into a search query for an art database. Focus on visual subjects, art styles, and specific painter names. Return ONLY the search keywords separated by spaces. Do not use markdown.",
+                # The SDK enforces the timeout on the HTTP request itself (in milliseconds)
+                http_options=types.HttpOptions(timeout=timeout_seconds * 1000)
             )
-            return response.text
-        except Exception as e:
-            raise InterpreterError(f"Generation failed: {str(e)}")
-
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(_generate)
-        try:
-            result = future.result(timeout=timeout_seconds)
-            return result
-        except FuturesTimeoutError:
-            future.cancel()
-            raise InterpreterTimeoutError(f"Request timed out after {timeout_seconds} seconds")
-        except Exception as e:
-            raise InterpreterError(f"Unexpected error: {str(e)}")
+        )
+        return response
+    except httpx.TimeoutException:
+        raise InterpreterTimeoutError(f"Request timed out after {timeout_seconds} seconds")
+    except Exception as e:
+        raise InterpreterError(f"Generation failed: {str(e)}")
+
+
+def _token_counts(response: types.GenerateContentResponse, estimated_input: int, estimated_output: int) -> Tuple[int, int]:
+    """
+    Get the input and output token counts reported by the API for a response.
+
+    Falls back to the given estimates for any count the response doesn't include.
+
+    Returns:
+        Tuple of (input tokens, output tokens)
+    """
+    usage = response.usage_metadata
+    if usage is None:
+        return estimated_input, estimated_output
+
+    input_tokens = usage.prompt_token_count
+    output_tokens = usage.candidates_token_count
+    return (
+        estimated_input if input_tokens is None else input_tokens,
+        estimated_output if output_tokens is None else output_tokens
+    )
+
+
+def _fetch_image(image_url: str, deadline: Optional[float] = None) -> Tuple[bytes, str]:
+    """
+    Download an artwork image for vision analysis.
+
+    The body is streamed and the download stops as soon as it exceeds
+    MAX_IMAGE_BYTES, so a huge or non-image response can't tie up memory.
+
+    Args:
+        image_url: URL of the artwork image
+        deadline: time.monotonic() value by which the download must finish (default: 10s per read)
+
+    Returns:
+        Tuple of (image bytes, MIME type)
+
+    Raises:
+        InterpreterTimeoutError: If the download doesn't finish before the deadline
+        InterpreterError: If the fetch fails, the response isn't an image, or it is too large
+    """
+    read_timeout = 10.0 if deadline is None else deadline - time.monotonic()
+    if read_timeout <= 0:
+        raise InterpreterTimeoutError("Ran out of time before the image could be downloaded")
+
+    try:
+        with _SESSION.get(image_url, stream=True, timeout=(min(3.05, read_timeout), read_timeout)) as response:
+            response.raise_for_status()
+
+            # Some hosts serve images untyped or as application/octet-stream; only then
+            # fall back to the URL's extension. Any other type (e.g. an HTML error page) is rejected.
+            mime_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if mime_type in ("", "application/octet-stream"):
+                mime_type = mimetypes.guess_type(image_url)[0] or mime_type
+            if not mime_type.startswith("image/"):
+                raise InterpreterError(f"URL did not return an image (Content-Type: {mime_type or 'unknown'})")
+
+            too_large = f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)} MiB"
+            if int(response.headers.get("Content-Length") or 0) > MAX_IMAGE_BYTES:
+                raise InterpreterError(too_large)
+
+            buffer = io.BytesIO()
+            while True:
+                if deadline is not None:
+                    # Give each read only the time left, so a trickling server can't overrun the deadline
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise InterpreterTimeoutError("Image download took too long")
+                    sock = getattr(response.raw.connection, "sock", None)
+                    if sock is not None:
+                        sock.settimeout(remaining)
+
+                # read1 returns after a single socket read, unlike iter_content, which
+                # keeps reading until a whole chunk has arrived
+                chunk = response.raw.read1(64 * 1024, decode_content=True)
+                if not chunk:
+                    break
+                buffer.write(chunk)
+                if buffer.tell() > MAX_IMAGE_BYTES:
+                    raise InterpreterError(too_large)
+
+            return buffer.getvalue(), mime_type
+
+    except (requests.Timeout, urllib3.exceptions.ReadTimeoutError):
+        # Reading the body raises urllib3's ReadTimeoutError rather than requests.Timeout
+        raise InterpreterTimeoutError("Image download timed out")
+    except (requests.RequestException, urllib3.exceptions.HTTPError, ValueError) as e:
+        raise InterpreterError(f"Failed to fetch image: {str(e)}")
+
+
+def _is_unusable_uri_error(error: errors.APIError) -> bool:
+    """Check whether a failed by-URL request is worth retrying with the image sent inline."""
+    if error.code in _FATAL_ERROR_CODES:
+        return False
+    return 400 <= error.code < 500 or error.code == 500
+
+
+def _downscale_image(image_data: bytes, mime_type: str) -> Tuple[bytes, str]:
+    """
+    Shrink a large image to at most MAX_IMAGE_EDGE pixels and re-encode it as JPEG.
+
+    EXIF rotation is applied and transparent areas are filled with white.
+    Small images, images that can't be decoded, and images that wouldn't get
+    any smaller are returned unchanged.
+
+    Args:
+        image_data: Raw image bytes
+        mime_type: MIME type of image_data
+
+    Returns:
+        Tuple of (image bytes, MIME type)
+    """
+    if len(image_data) <= DOWNSCALE_MIN_BYTES:
+        return image_data, mime_type
+
+    try:
+        with Image.open(io.BytesIO(image_data)) as img:
+            # Rotate the pixels upright; the JPEG re-encode drops the EXIF orientation tag
+            image = ImageOps.exif_transpose(img)
+            image.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.LANCZOS)
+
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG has no alpha channel; show transparent areas as white rather than black
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+
+            output = io.BytesIO()
+            image.convert("RGB").save(output, "JPEG", quality=85, optimize=True)
+    except Exception:
+        # Let Gemini handle anything Pillow can't decode
+        return image_data, mime_type
+
+    if output.tell() >= len(image_data):
+        return image_data, mime_type
+
+    return output.getvalue(), "image/jpeg"
 
 
 def generate_keywords(text: str, timeout: int = 30) -> str:
     """
     Generate art search keywords from abstract philosophical text.
 
+    Keywords are cached per quote, so asking for the same quote again (or a
+    close rephrasing of it) returns instantly without an API call.
+
     Args:
         text: The abstract text to interpret
         timeout: Timeout in seconds (default: 30)
@@ -83,36 +253,45 @@ def generate_keywords(text: str, timeout: int = 30) -> str:
         InterpreterError: If API key is missing or generation fails
         InterpreterTimeoutError: If the request times out
     """
+    # Reuse keywords generated for the same quote earlier
+    cached = get_cached_keywords(text)
+    if cached:
+        return cached
+
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise InterpreterError("GEMINI_API_KEY environment variable not set")
 
-    # Initialize client
-    client = genai.Client(api_key=api_key)
-
-    # Model name
-    model_name = "gemini-2.0-flash-exp"
+    # Reuse the client across calls
+    client = _get_client(api_key)
 
     # Generate keywords with timeout
-    keywords = generate_with_timeout(client, model_name, text, timeout)
-
-    # Clean up the result (remove any markdown, extra whitespace)
-    keywords = keywords.strip().replace("\n", " ").replace("  ", " ")
+    response = generate_with_timeout(client, MODEL_NAME, text, timeout)
+    keywords = response.text or ""
 
-    # Remove any markdown formatting that might have slipped through
-    if keywords.startswith("```") or keywords.startswith("`"):
-        keywords = keywords.strip("`").strip()
+    # Clean up the result: collapse all whitespace runs, then remove any
+    # markdown backticks that slipped through
+    keywords = _BACKTICKS_RE.sub("", _WHITESPACE_RE.sub(" ", keywords).strip()).strip()
 
-    # Track API usage (estimate tokens based on text length)
+    # Track API usage with the token counts the API reports
     try:
-        input_tokens = len(text.split()) * 1.3  # Rough estimate: ~1.3 tokens per word
-        output_tokens = len(keywords.split()) * 1.3
+        input_tokens, output_tokens = _token_counts(
+            response,
+            int(len(text.split()) * 1.3),  # Rough estimate if not reported: ~1.3 tokens per word
+            int(len(keywords.split()) * 1.3)
+        )
         tracker = get_tracker()
-        tracker.track_request(int(input_tokens), int(output_tokens))
+        tracker.track_request(input_tokens, output_tokens)
     except Exception:
         # Don't fail the request if tracking fails
         pass
 
+    try:
+        save_cached_keywords(text, keywords)
+    except CacheError:
+        # Don't fail the request if caching fails
+        pass
+
     return keywords
 
 
@@ -120,6 +299,9 @@ def explain_artwork(image_url: str, original_query: str, artwork_title: str, art
     """
     Analyze an artwork image and explain how it connects to the original philosophical query.
 
+    Public HTTPS images are passed to Gemini by URL; the image is only
+    downloaded and sent inline if the API can't use the URL.
+
     Args:
         image_url: URL of the artwork image
         original_query: The original philosophical text/quote from the user
@@ -138,17 +320,8 @@ def explain_artwork(image_url: str, original_query: str, artwork_title: str, art
     if not api_key:
         raise InterpreterError("GEMINI_API_KEY environment variable not set")
 
-    # Fetch the image
-    try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        image_data = response.content
-    except requests.RequestException as e:
-        raise InterpreterError(f"Failed to fetch image: {str(e)}")
-
-    # Initialize client
-    client = genai.Client(api_key=api_key)
-    model_name = "gemini-2.0-flash-exp"
+    # Reuse the client across calls
+    client = _get_client(api_key)
 
     # Create a detailed prompt for analysis
     prompt = f"""You are an expert art critic and philosopher. Analyze this artwork and explain how it connects to the following philosophical concept or quote.
@@ -171,42 +344,64 @@ Please provide a thoughtful analysis covering:
 Keep your response concise but insightful (around 150-250 words). Use a thoughtful, accessible tone.
 """
 
-    def _analyze():
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=[
-                    types.Part.from_bytes(data=image_data, mime_type="image/jpeg"),
-                    prompt
-                ],
-                config=types.GenerateContentConfig(
-                    temperature=0.7,
-                    top_p=0.95,
-                    max_output_tokens=500
-                )
+    # The URL attempt, image download and inline attempt all share one time budget
+    deadline = time.monotonic() + timeout
+
+    def _analyze(image_part: types.Part):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise InterpreterTimeoutError(f"Vision analysis timed out after {timeout} seconds")
+
+        return client.models.generate_content(
+            model=MODEL_NAME,
+            contents=[image_part, prompt],
+            config=types.GenerateContentConfig(
+                temperature=0.7,
+                top_p=0.95,
+                max_output_tokens=500,
+                http_options=types.HttpOptions(timeout=int(remaining * 1000))
             )
-            return response.text
-        except Exception as e:
-            raise InterpreterError(f"Vision analysis failed: {str(e)}")
+        )
 
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        future = executor.submit(_analyze)
-        try:
-            result = future.result(timeout=timeout)
+    try:
+        response = None
 
-            # Track API usage (vision models use more tokens)
+        if image_url.startswith("https://"):
+            # Let Gemini fetch public images itself instead of downloading and re-uploading them here
+            url_mime_type = mimetypes.guess_type(image_url)[0] or "image/jpeg"
             try:
-                # Rough estimate: image ~1000 tokens, prompt ~200 tokens, output ~300 tokens
-                input_tokens = 1200
-                output_tokens = 300
-                tracker = get_tracker()
-                tracker.track_request(int(input_tokens), int(output_tokens))
-            except Exception:
-                pass
-
-            return result
-        except FuturesTimeoutError:
-            future.cancel()
-            raise InterpreterTimeoutError(f"Vision analysis timed out after {timeout} seconds")
-        except Exception as e:
-            raise InterpreterError(f"Unexpected error during vision analysis: {str(e)}")
+                response = _analyze(types.Part.from_uri(file_uri=image_url, mime_type=url_mime_type))
+            except errors.APIError as e:
+                # Rate limits and auth errors would fail the inline request too
+                if not _is_unusable_uri_error(e):
+                    raise
+
+                # The rejected attempt still counts against the request limits
+                try:
+                    get_tracker().track_request(0, 0)
+                except Exception:
+                    pass
+
+        if response is None:
+            # Fall back to fetching the image and sending its bytes inline
+            image_data, mime_type = _downscale_image(*_fetch_image(image_url, deadline))
+            response = _analyze(types.Part.from_bytes(data=image_data, mime_type=mime_type))
+
+        result = response.text
+        # Rough estimate if not reported: image ~1000 tokens, prompt ~200 tokens, output ~300 tokens
+        input_tokens, output_tokens = _token_counts(response, 1200, 300)
+    except InterpreterError:
+        raise
+    except httpx.TimeoutException:
+        raise InterpreterTimeoutError(f"Vision analysis timed out after {timeout} seconds")
+    except Exception as e:
+        raise InterpreterError(f"Vision analysis failed: {str(e)}")
+
+    # Track API usage (vision models use more tokens)
+    try:
+        tracker = get_tracker()
+        tracker.track_request(input_tokens, output_tokens)
+    except Exception:
+        pass
+
+    return result
@@ -4,21 +4,30 @@ main.py - CLI Interface for Muse CLI
 A tool to interpret abstract philosophical text into art search keywords and find artwork.
 """
 
-import sys
 import typer
+from functools import lru_cache, partial
+from itertools import chain
+from typing import Dict, Iterator
 from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from rich.text import Text
-from rich.spinner import Spinner
-from rich.live import Live
-from typing import Optional
 
-from interpreter import generate_keywords, explain_artwork, InterpreterError, InterpreterTimeoutError
-from curator import search_art, CuratorError
-from gallery_apis import search_art_api, GalleryAPIError
-from usage_tracker import get_tracker
-from search_cache import save_search_results, get_artwork_by_index, CacheError
+# The AI and gallery backends (google-genai, apify-client, requests), the cache
+# and usage modules, and most of Rich are imported inside the commands that
+# need them, so --help and version don't pay for them at startup.
+
+
+class SearchError(Exception):
+    """Raised when a gallery search fails, with an optional hint for the user."""
+
+    def __init__(self, message: str, hint: str = ""):
+        super().__init__(message)
+        self.hint = hint
+
+
+# Rich style for the clickable image link in each results row
+LINK_TEMPLATE = "link {}"
+
+# Usage percentage colors: under 80%, over 80%, at or over 100%
+_USAGE_COLORS = ("green", "yellow", "red")
 
 
 app = typer.Typer(
@@ -26,7 +35,89 @@ app = typer.Typer(
     help="Convert philosophical text into art search keywords and find artwork.",
     add_completion=False
 )
-console = Console()
+
+
+@lru_cache(maxsize=1)
+def get_console() -> Console:
+    """Return the shared Rich console, creating it on first use."""
+    return Console()
+
+
+# The search functions below are generators, so each backend is imported only
+# when its source is actually searched, and its errors are reported as SearchError.
+
+def _search_meisterdrucke(keywords: str, max_results: int) -> Iterator[Dict[str, str]]:
+    """Search Meisterdrucke through the Apify scraper (all results arrive at once)."""
+    from curator import search_art, CuratorError
+
+    try:
+        artworks = search_art(keywords, max_results=max_results)
+    except CuratorError as e:
+        raise SearchError(str(e), hint="Make sure APIFY_TOKEN is set in your environment")
+
+    yield from artworks
+
+
+def _search_gallery_api(source: str, keywords: str, max_results: int) -> Iterator[Dict[str, str]]:
+    """Search one of the official gallery APIs, yielding artworks as they arrive."""
+    from gallery_apis import iter_art_api, GalleryAPIError
+
+    try:
+        yield from iter_art_api(source, keywords, max_results=max_results)
+    except GalleryAPIError as e:
+        raise SearchError(str(e))
+
+
+def _preconnect_gallery_api(source: str) -> None:
+    """Open a connection to a gallery API in the background."""
+    from gallery_apis import preconnect
+    preconnect(source)
+
+
+# Supported art gallery sources: display name, search function returning an
+# artwork iterator, and an optional function that warms up the connection
+_SOURCES = {
+    "meisterdrucke": ("Meisterdrucke via Apify", _search_meisterdrucke, None),
+    "met": ("Metropolitan Museum of Art", partial(_search_gallery_api, "met"), partial(_preconnect_gallery_api, "met")),
+    "wikiart": ("WikiArt", partial(_search_gallery_api, "wikiart"), partial(_preconnect_gallery_api, "wikiart"))
+}
+
+
+def _print_search_error(console: Console, error: SearchError) -> None:
+    """Report a failed gallery search."""
+    console.print(f"[bold red]✗ Error:[/bold red] {str(error)}", style="red")
+    if error.hint:
+        console.print(f"[yellow]{error.hint}[/yellow]")
+
+
+def _save_results_quietly(quote: str, keywords: str, artworks: list, source: str) -> None:
+    """Save search results for the explain command, ignoring cache failures."""
+    from search_cache import save_search_results, CacheError
+
+    try:
+        save_search_results(quote, keywords, artworks, source)
+    except CacheError:
+        # Don't fail the search if caching fails
+        pass
+
+
+def _build_results_table():
+    """Create the empty artwork results table with its columns."""
+    from rich.table import Table
+
+    table = Table(
+        show_header=True,
+        header_style="bold cyan",
+        border_style="blue",
+        title="[bold]Artwork Results[/bold]",
+        title_style="bold magenta"
+    )
+
+    table.add_column("#", style="dim", width=4, justify="right")
+    table.add_column("Title", style="white", min_width=30)
+    table.add_column("Artist", style="yellow", min_width=20)
+    table.add_column("Link", style="blue", min_width=15)
+    return table
 
 
 @app.command()
@@ -47,6 +138,13 @@ def search(
     - met: Metropolitan Museum of Art (official API, no key needed)
     - wikiart: WikiArt database (official API, no key needed)
     """
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.text import Text
+    from interpreter import generate_keywords, InterpreterError, InterpreterTimeoutError
+
+    console = get_console()
+
     # Display header panel
     console.print()
     console.print(Panel.fit(
@@ -56,6 +154,20 @@ def search(
     ))
     console.print()
 
+    # Validate source before spending an AI request
+    entry = _SOURCES.get(source.lower())
+    if entry is None:
+        console.print(f"[bold red]✗ Error:[/bold red] Invalid source '{source}'", style="red")
+        console.print(f"[yellow]Valid sources: {', '.join(_SOURCES)}[/yellow]")
+        raise typer.Exit(code=1)
+
+    source = source.lower()
+    source_name, search_source, preconnect = entry
+
+    # Warm up the gallery API connection while the AI generates keywords
+    if preconnect is not None:
+        preconnect()
+
     # Step 1: Generate keywords using Gemma
     keywords = None
     with console.status("[bold cyan]Consulting Gemma...[/bold cyan]", spinner="dots"):
@@ -77,89 +189,63 @@ def search(
     # Step 2: Search artwork from chosen source
     artworks = []
 
-    # Validate source
-    valid_sources = ["meisterdrucke", "met", "wikiart"]
-    if source.lower() not in valid_sources:
-        console.print(f"[bold red]✗ Error:[/bold red] Invalid source '{source}'", style="red")
-        console.print(f"[yellow]Valid sources: {', '.join(valid_sources)}[/yellow]")
-        raise typer.Exit(code=1)
-
-    source = source.lower()
-
     # Set status message based on source
-    source_names = {
-        "meisterdrucke": "Meisterdrucke via Apify",
-        "met": "Metropolitan Museum of Art",
-        "wikiart": "WikiArt"
-    }
-    status_msg = f"[bold cyan]Searching {source_names[source]}...[/bold cyan]"
+    status_msg = f"[bold cyan]Searching {source_name}...[/bold cyan]"
 
+    # Wait for the first artwork under the spinner; the rest stream into the table
     with console.status(status_msg, spinner="dots"):
         try:
-            if source == "meisterdrucke":
-                # Use Apify scraping
-                artworks = search_art(keywords, max_results=max_results)
-            else:
-                # Use API-based sources
-                artworks = search_art_api(source, keywords, max_results=max_results)
-        except CuratorError as e:
-            console.print(f"[bold red]✗ Error:[/bold red] {str(e)}", style="red")
-            console.print("[yellow]Make sure APIFY_TOKEN is set in your environment[/yellow]")
-            raise typer.Exit(code=1)
-        except GalleryAPIError as e:
-            console.print(f"[bold red]✗ Error:[/bold red] {str(e)}", style="red")
+            results = search_source(keywords, max_results=max_results)
+            first_artwork = next(results, None)
+        except SearchError as e:
+            _print_search_error(console, e)
             raise typer.Exit(code=1)
 
     # Step 3: Display results
-    if not artworks:
+    if first_artwork is None:
         console.print("[yellow]No artworks found. Try a different quote or keywords.[/yellow]")
         raise typer.Exit(code=0)
 
-    console.print(f"[bold green]✓ Found {len(artworks)} artwork(s)[/bold green]")
-    console.print()
-
     # Create results table
-    table = Table(
-        show_header=True,
-        header_style="bold cyan",
-        border_style="blue",
-        title="[bold]Artwork Results[/bold]",
-        title_style="bold magenta"
-    )
+    table = _build_results_table()
 
-    table.add_column("#", style="dim", width=4, justify="right")
-    table.add_column("Title", style="white", min_width=30)
-    table.add_column("Artist", style="yellow", min_width=20)
-    table.add_column("Link", style="blue", min_width=15)
-
-    # Add rows to table
-    for idx, artwork in enumerate(artworks, 1):
-        title = artwork.get("title", "Untitled")
-        artist = artwork.get("artist", "Unknown")
-        image_url = artwork.get("image_url", "")
-
-        # Create clickable hyperlink using Rich's native link support
-        link = Text("[View Image]", style=f"link {image_url}")
+    # Add rows as artworks arrive, so the first ones show while the rest are still loading
+    stream_error = None
+    with Live(table, console=console, refresh_per_second=8) as live:
+        try:
+            for idx, artwork in enumerate(chain((first_artwork,), results), 1):
+                artworks.append(artwork)
+
+                # Create clickable hyperlink using Rich's native link support
+                link = Text("[View Image]", style=LINK_TEMPLATE.format(artwork.get("image_url", "")))
+
+                table.add_row(
+                    str(idx),
+                    artwork.get("title", "Untitled"),
+                    artwork.get("artist", "Unknown"),
+                    link
+                )
+                live.refresh()
+        except SearchError as e:
+            stream_error = e
+
+    # Live only ends the table with a newline when writing to a terminal
+    if not console.is_terminal:
+        console.line()
+
+    if stream_error is not None:
+        _print_search_error(console, stream_error)
+        raise typer.Exit(code=1)
 
-        table.add_row(
-            str(idx),
-            title,
-            artist,
-            link
-        )
+    # Save search results to cache for the explain command
+    _save_results_quietly(quote, keywords, artworks, source)
 
-    console.print(table)
+    console.print()
+    console.print(f"[bold green]✓ Found {len(artworks)} artwork(s)[/bold green]")
     console.print()
     console.print("[dim]Tip: Right-click on [View Image] links and select 'Copy Link Address'[/dim]")
     console.print("[dim]Tip: Use 'muse explain <number>' to get AI analysis of any artwork[/dim]")
 
-    # Save search results to cache for the explain command
-    try:
-        save_search_results(quote, keywords, artworks, source)
-    except CacheError:
-        # Don't fail the search if caching fails
-        pass
-
 
 @app.command()
 def explain(
@@ -176,6 +262,12 @@ def explain(
         muse search "the weight of existence"
         muse explain 3  # Analyze artwork #3 from the search results
     """
+    from rich.panel import Panel
+    from interpreter import explain_artwork, InterpreterError, InterpreterTimeoutError
+    from search_cache import get_artwork_by_index, CacheError
+
+    console = get_console()
+
     # Display header panel
     console.print()
     console.print(Panel.fit(
@@ -243,13 +335,25 @@ def explain(
 @app.command()
 def version():
     """Show version information."""
+    console = get_console()
     console.print("[bold]Muse CLI[/bold] v1.0.0")
     console.print("[dim]A philosophical art search tool[/dim]")
 
 
+def _usage_color(percentage: float) -> str:
+    """Pick the display color for a usage percentage."""
+    return _USAGE_COLORS[(percentage > 80) + (percentage >= 100)]
+
+
 @app.command()
 def usage():
     """Show Gemini API usage statistics and free tier limits."""
+    from rich.panel import Panel
+    from rich.table import Table
+    from usage_tracker import get_tracker
+
+    console = get_console()
+
     console.print()
     console.print(Panel.fit(
         "[bold magenta]Gemini API Usage Tracker[/bold magenta]\n"
@@ -277,8 +381,8 @@ def usage():
         table.add_column("Usage %", style="green", min_width=10, justify="right")
 
         # Today's usage
-        daily_req_color = "red" if stats["daily_request_percentage"] >= 100 else "yellow" if stats["daily_request_percentage"] > 80 else "green"
-        daily_tok_color = "red" if stats["daily_token_percentage"] >= 100 else "yellow" if stats["daily_token_percentage"] > 80 else "green"
+        daily_req_color = _usage_color(stats["daily_request_percentage"])
+        daily_tok_color = _usage_color(stats["daily_token_percentage"])
 
         table.add_row(
             "Today's Requests",
@@ -347,7 +451,7 @@ def usage():
             console.print()
 
         # Tips
-        console.print("[dim]Tip: Usage tracking is based on estimates. Actual API usage may vary.[/dim]")
+        console.print("[dim]Tip: Token counts are reported by the API; requests made outside Muse CLI aren't included.[/dim]")
 
     except Exception as e:
         console.print(f"[bold red]Error loading usage statistics:[/bold red] {str(e)}")
@@ -1,13 +1,42 @@
 """
 search_cache.py - Cache Layer for Muse CLI
-Stores the last search results to enable the 'explain' command.
+Stores the last search results to enable the 'explain' command,
+and previously generated keywords so repeated quotes skip the AI call.
 """
 
+import hashlib
 import json
-import os
-from datetime import datetime
+import re
+import time
+from functools import lru_cache
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from pathlib import Path
+from storage import get_data_dir, write_json_atomic
+
+
+# How long generated keywords are reused for the same quote
+KEYWORD_CACHE_TTL = timedelta(days=30)
+
+# Minimum overlap (Jaccard index) between two quotes' content words for one
+# quote to reuse the other's keywords
+KEYWORD_SIMILARITY_THRESHOLD = 0.8
+
+# Fewest content words both quotes need before they are compared at all; with
+# one or two words a single shared word ("not", "sea") would count as a match
+KEYWORD_MIN_FUZZY_TERMS = 3
+
+# Filler words ignored when comparing quotes. Negations are deliberately kept,
+# since "love is not war" shouldn't reuse the keywords of "love is war".
+_STOPWORDS = frozenset("""
+    a an the and or but of to in on at by for from with about into as
+    is are was were be been being am do does did has have had
+    i me my we our you your he him his she her it its they them their
+    this that these those there here so than then what which who whom
+""".split())
+
+_POSSESSIVE_RE = re.compile(r"['\u2019]s\b")
+_WORD_RE = re.compile(r"\w\w+")
 
 
 class CacheError(Exception):
@@ -15,18 +44,143 @@ class CacheError(Exception):
     pass
 
 
+def _read_json(path: Path):
+    """Read a JSON file in binary mode, letting json detect the UTF-8 encoding."""
+    return json.loads(path.read_bytes())
+
+
 def get_cache_dir() -> Path:
     """Get or create the cache directory."""
-    cache_dir = Path.home() / ".muse-cli"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    return cache_dir
+    return get_data_dir()
 
 
+@lru_cache(maxsize=1)
 def get_cache_file() -> Path:
     """Get the path to the cache file."""
     return get_cache_dir() / "last_search.json"
 
 
+@lru_cache(maxsize=1)
+def get_keyword_cache_file() -> Path:
+    """Get the path to the keyword cache file."""
+    return get_cache_dir() / "keywords.json"
+
+
+def _quote_key(text: str) -> str:
+    """Hash a quote after normalizing case and whitespace."""
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def _quote_terms(text: str) -> List[str]:
+    """Reduce a quote to its sorted set of content words, for fuzzy matching."""
+    words = _WORD_RE.findall(_POSSESSIVE_RE.sub("", text.lower()))
+    return sorted(set(words) - _STOPWORDS)
+
+
+def _similarity(terms: set, other_terms: List[str]) -> float:
+    """Jaccard index of two content-word sets."""
+    other = set(other_terms)
+    union = len(terms | other)
+    return len(terms & other) / union if union else 0.0
+
+
+def _is_fresh(entry: Dict[str, str], now: datetime) -> bool:
+    """Check whether a keyword cache entry is still within its TTL."""
+    try:
+        return now - datetime.fromisoformat(entry["timestamp"]) <= KEYWORD_CACHE_TTL
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def _load_keyword_cache() -> Dict[str, Dict[str, str]]:
+    """Load the keyword cache, treating a missing or corrupt file as empty."""
+    try:
+        cache = _read_json(get_keyword_cache_file())
+    except (ValueError, IOError):  # JSONDecodeError or undecodable bytes
+        return {}
+
+    return cache if isinstance(cache, dict) else {}
+
+
+def get_cached_keywords(text: str) -> Optional[str]:
+    """
+    Look up previously generated keywords for a quote.
+
+    An exact match (ignoring case and whitespace) is tried first. Otherwise the
+    quote is compared with earlier ones by their content words, ignoring
+    punctuation, possessives, word order and filler words, so a rephrasing
+    like "existence's quiet weight" reuses the keywords for "the quiet weight of
+    existence". Quotes with fewer than KEYWORD_MIN_FUZZY_TERMS content words
+    only match exactly.
+
+    Args:
+        text: The original philosophical text/quote from the user
+
+    Returns:
+        Cached keywords, or None if no similar quote has been seen or the entry expired
+    """
+    cache = _load_keyword_cache()
+    now = datetime.now()
+
+    entry = cache.get(_quote_key(text))
+    if entry and _is_fresh(entry, now):
+        return entry.get("keywords")
+
+    terms = set(_quote_terms(text))
+    if len(terms) < KEYWORD_MIN_FUZZY_TERMS:
+        return None
+
+    best_entry, best_score = None, KEYWORD_SIMILARITY_THRESHOLD
+    for entry in cache.values():
+        entry_terms = entry.get("terms") if isinstance(entry, dict) else None
+        if not entry_terms or len(entry_terms) < KEYWORD_MIN_FUZZY_TERMS or not _is_fresh(entry, now):
+            continue
+
+        score = _similarity(terms, entry_terms)
+        if score >= best_score:
+            best_entry, best_score = entry, score
+
+    return best_entry.get("keywords") if best_entry else None
+
+
+def save_cached_keywords(text: str, keywords: str) -> None:
+    """
+    Remember the keywords generated for a quote.
+
+    Args:
+        text: The original philosophical text/quote from the user
+        keywords: The generated search keywords
+
+    Raises:
+        CacheError: If saving fails
+    """
+    try:
+        now = datetime.now()
+
+        # Drop expired entries so the file doesn't grow without bound
+        cache = {key: entry for key, entry in _load_keyword_cache().items() if _is_fresh(entry, now)}
+        cache[_quote_key(text)] = {
+            "keywords": keywords,
+            "terms": _quote_terms(text),
+            "timestamp": now.isoformat()
+        }
+
+        write_json_atomic(get_keyword_cache_file(), cache)
+
+    except Exception as e:
+        raise CacheError(f"Failed to save keywords: {str(e)}")
+
+
+# last_search.json stores artworks column-wise (one list per field) rather than
+# as a list of dicts, matching how the scraper returns them
+_ARTWORK_COLUMNS = {
+    "title": "titles",
+    "artist": "artists",
+    "image_url": "image_urls"
+}
+
+
 def save_search_results(original_query: str, keywords: str, artworks: List[Dict[str, str]], source: str) -> None:
     """
     Save search results to cache.
@@ -42,28 +196,69 @@ def save_search_results(original_query: str, keywords: str, artworks: List[Dict[
     """
     try:
         cache_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": int(time.time()),
             "original_query": original_query,
             "keywords": keywords,
-            "source": source,
-            "artworks": artworks
+            "source": source
         }
+        for field, column in _ARTWORK_COLUMNS.items():
+            cache_data[column] = [artwork.get(field, "") for artwork in artworks]
 
-        cache_file = get_cache_file()
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, indent=2, ensure_ascii=False)
+        write_json_atomic(get_cache_file(), cache_data)
 
     except Exception as e:
         raise CacheError(f"Failed to save search results: {str(e)}")
 
 
+def _load_search_file() -> Optional[Dict]:
+    """
+    Read the raw last search cache, in either the columnar or the older list format.
+
+    Returns:
+        Cached data, or None if no cache exists or required fields are missing
+
+    Raises:
+        CacheError: If loading fails
+    """
+    try:
+        cache_data = _read_json(get_cache_file())
+    except FileNotFoundError:
+        return None
+    except (ValueError, IOError) as e:  # JSONDecodeError or undecodable bytes
+        raise CacheError(f"Failed to load search results: {str(e)}")
+
+    # Validate required fields
+    required_fields = ["timestamp", "original_query", "keywords"]
+    if not isinstance(cache_data, dict) or not all(field in cache_data for field in required_fields):
+        return None
+
+    if "artworks" not in cache_data and not all(column in cache_data for column in _ARTWORK_COLUMNS.values()):
+        return None
+
+    return cache_data
+
+
+def _artwork_count(cache_data: Dict) -> int:
+    """Number of artworks in raw cache data."""
+    if "artworks" in cache_data:
+        return len(cache_data["artworks"])
+    return len(cache_data["titles"])
+
+
+def _artwork_at(cache_data: Dict, array_index: int) -> Dict[str, str]:
+    """Get one artwork from raw cache data without rebuilding the whole list."""
+    if "artworks" in cache_data:
+        return cache_data["artworks"][array_index]
+    return {field: cache_data[column][array_index] for field, column in _ARTWORK_COLUMNS.items()}
+
+
 def load_search_results() -> Optional[Dict]:
     """
     Load the last search results from cache.
 
     Returns:
         Dictionary containing:
-        - timestamp: ISO format timestamp
+        - timestamp: Unix timestamp (an ISO format string in older caches)
         - original_query: The original user query
         - keywords: Generated keywords
         - source: Gallery source
@@ -74,24 +269,16 @@ def load_search_results() -> Optional[Dict]:
     Raises:
         CacheError: If loading fails
     """
-    cache_file = get_cache_file()
-
-    if not cache_file.exists():
-        return None
-
-    try:
-        with open(cache_file, 'r', encoding='utf-8') as f:
-            cache_data = json.load(f)
-
-        # Validate required fields
-        required_fields = ["timestamp", "original_query", "keywords", "artworks"]
-        if not all(field in cache_data for field in required_fields):
-            return None
+    cache_data = _load_search_file()
 
+    if cache_data is None or "artworks" in cache_data:
         return cache_data
 
-    except (json.JSONDecodeError, IOError) as e:
-        raise CacheError(f"Failed to load search results: {str(e)}")
+    cache_data["artworks"] = [_artwork_at(cache_data, i) for i in range(_artwork_count(cache_data))]
+    for column in _ARTWORK_COLUMNS.values():
+        del cache_data[column]
+
+    return cache_data
 
 
 def get_artwork_by_index(index: int) -> Optional[Dict[str, str]]:
@@ -107,21 +294,21 @@ def get_artwork_by_index(index: int) -> Optional[Dict[str, str]]:
     Raises:
         CacheError: If loading fails or no cache exists
     """
-    cache_data = load_search_results()
+    cache_data = _load_search_file()
 
     if cache_data is None:
         raise CacheError("No previous search found. Run 'muse search' first.")
 
-    artworks = cache_data.get("artworks", [])
+    artwork_count = _artwork_count(cache_data)
 
     # Convert to 0-based index
     array_index = index - 1
 
-    if array_index < 0 or array_index >= len(artworks):
-        raise CacheError(f"Invalid index {index}. Last search had {len(artworks)} results.")
+    if array_index < 0 or array_index >= artwork_count:
+        raise CacheError(f"Invalid index {index}. Last search had {artwork_count} results.")
 
     return {
-        "artwork": artworks[array_index],
+        "artwork": _artwork_at(cache_data, array_index),
         "original_query": cache_data["original_query"],
         "keywords": cache_data["keywords"],
         "source": cache_data.get("source", "unknown")
@@ -135,10 +322,8 @@ def clear_cache() -> bool:
     Returns:
         True if cache was cleared, False if no cache existed
     """
-    cache_file = get_cache_file()
-
-    if cache_file.exists():
-        cache_file.unlink()
+    try:
+        get_cache_file().unlink()
         return True
-
-    return False
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,44 @@
+"""
+storage.py - Local Storage Helpers for Muse CLI
+Locates the ~/.muse-cli data directory and writes JSON files there safely.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+
+# Data directory, set once it has been created in this process
+_DATA_DIR: Optional[Path] = None
+
+
+def get_data_dir() -> Path:
+    """Get or create the ~/.muse-cli data directory."""
+    global _DATA_DIR
+    if _DATA_DIR is None:
+        data_dir = Path.home() / ".muse-cli"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        _DATA_DIR = data_dir
+    return _DATA_DIR
+
+
+def write_json_atomic(path: Path, data) -> None:
+    """
+    Write data to a JSON file without ever leaving a partially written file.
+
+    The document is encoded with a single json.dumps call (json.dump with
+    indent would fall back to the pure-Python encoder and many small writes),
+    written to a temporary file next to path, then swapped into place with
+    os.replace.
+
+    Raises:
+        OSError: If the file can't be written
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_bytes(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
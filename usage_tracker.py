@@ -3,11 +3,26 @@ usage_tracker.py - Track Gemini API usage for Muse CLI
 Monitors API calls and token usage against free tier limits.
 """
 
+import atexit
 import json
-import os
-from datetime import datetime, date
-from pathlib import Path
-from typing import Dict
+from datetime import date
+from typing import Dict, Tuple
+from storage import get_data_dir, write_json_atomic
+
+
+def _limit_percentages(daily_requests: int, daily_tokens: int, request_limit: int, token_limit: int) -> Tuple[float, float, bool, bool]:
+    """
+    Compare daily usage against the free tier limits.
+
+    Returns:
+        Tuple of (request %, token %, approaching limit, at limit)
+    """
+    request_pct = daily_requests * 100 / request_limit
+    token_pct = daily_tokens * 100 / token_limit
+
+    # 0 = fine, 1 = over 80%, 2 = at or over 100%, for whichever is closer to its limit
+    level = max((request_pct > 80) + (request_pct >= 100), (token_pct > 80) + (token_pct >= 100))
+    return request_pct, token_pct, level >= 1, level == 2
 
 
 class UsageTracker:
@@ -20,70 +35,88 @@ class UsageTracker:
         "tokens_per_day": 1_000_000
     }
 
+    # Tracked requests kept in memory before usage.json is rewritten
+    FLUSH_THRESHOLD = 5
+
     def __init__(self):
         """Initialize the usage tracker with persistent storage."""
-        self.config_dir = Path.home() / ".muse-cli"
+        self.config_dir = get_data_dir()
         self.usage_file = self.config_dir / "usage.json"
-        self._ensure_config_dir()
         self.data = self._load_usage()
 
-    def _ensure_config_dir(self):
-        """Create config directory if it doesn't exist."""
-        self.config_dir.mkdir(parents=True, exist_ok=True)
+        # Requests tracked since the last save; anything pending is written at exit
+        self._pending_flush_count = 0
+        atexit.register(self.flush)
 
     def _load_usage(self) -> Dict:
         """Load usage data from file."""
-        if self.usage_file.exists():
-            try:
-                with open(self.usage_file, 'r') as f:
-                    data = json.load(f)
-                    # Check if we need to reset daily counters
-                    last_date = data.get("last_reset_date")
-                    today = str(date.today())
-
-                    if last_date != today:
-                        # Reset daily counters
-                        data["daily_requests"] = 0
-                        data["daily_tokens"] = 0
-                        data["last_reset_date"] = today
-
-                    return data
-            except (json.JSONDecodeError, IOError):
-                return self._create_default_data()
-        else:
+        # Open directly rather than checking exists() first; a missing file
+        # (first run) raises FileNotFoundError, an IOError
+        try:
+            with open(self.usage_file, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
             return self._create_default_data()
 
+        self._migrate_dates(data)
+        self._maybe_rollover(data)
+        return data
+
+    @staticmethod
+    def _migrate_dates(data: Dict):
+        """Convert the ISO date strings written by older versions to day ordinals."""
+        for old_key, new_key in (("last_reset_date", "last_reset_ordinal"), ("first_use_date", "first_use_ordinal")):
+            old_value = data.pop(old_key, None)
+            if new_key in data:
+                continue
+            try:
+                data[new_key] = date.fromisoformat(old_value).toordinal()
+            except (TypeError, ValueError):
+                data[new_key] = date.today().toordinal()
+
+    @staticmethod
+    def _maybe_rollover(data: Dict):
+        """Reset the daily counters in data if the day has changed since they were last reset."""
+        today = date.today().toordinal()
+
+        if data.get("last_reset_ordinal") != today:
+            data["daily_requests"] = 0
+            data["daily_tokens"] = 0
+            data["last_reset_ordinal"] = today
+
     def _create_default_data(self) -> Dict:
         """Create default usage data structure."""
+        today = date.today().toordinal()
         return {
             "total_requests": 0,
             "total_input_tokens": 0,
             "total_output_tokens": 0,
             "daily_requests": 0,
             "daily_tokens": 0,
-            "last_reset_date": str(date.today()),
-            "first_use_date": str(date.today())
+            # Dates are stored as proleptic Gregorian ordinals (date.toordinal())
+            "last_reset_ordinal": today,
+            "first_use_ordinal": today
         }
 
     def _save_usage(self):
         """Persist usage data to file."""
         try:
-            with open(self.usage_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            # Atomic replace, so an interrupted save can't wipe the all-time counters
+            write_json_atomic(self.usage_file, self.data)
         except IOError as e:
             # Silently fail if we can't save (don't interrupt user flow)
             pass
 
     def track_request(self, input_tokens: int = 50, output_tokens: int = 20):
         """
-        Track an API request with estimated token usage.
+        Track an API request and its token usage.
 
         Args:
-            input_tokens: Estimated input tokens (default: 50 for typical quote)
-            output_tokens: Estimated output tokens (default: 20 for keywords)
+            input_tokens: Prompt tokens reported by the API (default: 50 for typical quote)
+            output_tokens: Output tokens reported by the API (default: 20 for keywords)
         """
-        # Reload to get latest data (in case of concurrent usage)
-        self.data = self._load_usage()
+        # The tracker may outlive midnight; start a new day's counters if so
+        self._maybe_rollover(self.data)
 
         # Update counters
         self.data["total_requests"] += 1
@@ -92,8 +125,16 @@ class UsageTracker:
         self.data["daily_requests"] += 1
         self.data["daily_tokens"] += (input_tokens + output_tokens)
 
-        # Save updated data
-        self._save_usage()
+        # Save in batches rather than rewriting the file on every request
+        self._pending_flush_count += 1
+        if self._pending_flush_count >= self.FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self):
+        """Write any tracked requests that haven't been saved yet."""
+        if self._pending_flush_count:
+            self._save_usage()
+            self._pending_flush_count = 0
 
     def get_usage_stats(self) -> Dict:
         """
@@ -102,35 +143,44 @@ class UsageTracker:
         Returns:
             Dictionary with usage stats and percentages
         """
-        self.data = self._load_usage()
+        # __init__ already loaded usage.json; only the day may have changed since
+        self._maybe_rollover(self.data)
 
-        total_tokens = self.data["total_input_tokens"] + self.data["total_output_tokens"]
+        data = self.data
+        input_tokens = data["total_input_tokens"]
+        output_tokens = data["total_output_tokens"]
+        daily_requests = data["daily_requests"]
+        daily_tokens = data["daily_tokens"]
+        request_limit = self.FREE_TIER_LIMITS["requests_per_day"]
+        token_limit = self.FREE_TIER_LIMITS["tokens_per_day"]
 
         # Calculate percentages of free tier limits
-        daily_request_pct = (self.data["daily_requests"] / self.FREE_TIER_LIMITS["requests_per_day"]) * 100
-        daily_token_pct = (self.data["daily_tokens"] / self.FREE_TIER_LIMITS["tokens_per_day"]) * 100
+        daily_request_pct, daily_token_pct, approaching_limit, at_limit = _limit_percentages(
+            daily_requests, daily_tokens, request_limit, token_limit
+        )
 
         return {
-            "total_requests": self.data["total_requests"],
-            "total_tokens": total_tokens,
-            "total_input_tokens": self.data["total_input_tokens"],
-            "total_output_tokens": self.data["total_output_tokens"],
-            "daily_requests": self.data["daily_requests"],
-            "daily_tokens": self.data["daily_tokens"],
-            "daily_request_limit": self.FREE_TIER_LIMITS["requests_per_day"],
-            "daily_token_limit": self.FREE_TIER_LIMITS["tokens_per_day"],
+            "total_requests": data["total_requests"],
+            "total_tokens": input_tokens + output_tokens,
+            "total_input_tokens": input_tokens,
+            "total_output_tokens": output_tokens,
+            "daily_requests": daily_requests,
+            "daily_tokens": daily_tokens,
+            "daily_request_limit": request_limit,
+            "daily_token_limit": token_limit,
             "daily_request_percentage": daily_request_pct,
             "daily_token_percentage": daily_token_pct,
-            "last_reset_date": self.data["last_reset_date"],
-            "first_use_date": self.data["first_use_date"],
-            "approaching_limit": daily_request_pct > 80 or daily_token_pct > 80,
-            "at_limit": daily_request_pct >= 100 or daily_token_pct >= 100
+            "last_reset_date": date.fromordinal(data["last_reset_ordinal"]).isoformat(),
+            "first_use_date": date.fromordinal(data["first_use_ordinal"]).isoformat(),
+            "approaching_limit": approaching_limit,
+            "at_limit": at_limit
         }
 
     def reset_stats(self):
         """Reset all usage statistics (for testing or manual reset)."""
         self.data = self._create_default_data()
         self._save_usage()
+        self._pending_flush_count = 0
 
     def check_limits(self) -> tuple[bool, str]:
         """